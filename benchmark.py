@@ -0,0 +1,131 @@
+"""
+Benchmarks for the Minesweeper engine.
+
+Usage: python benchmark.py memory [--height H --width W --mines M --sentences N]
+       python benchmark.py speed [--height H --width W --mines M --games N]
+"""
+
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+
+from minesweeper import BitSentence, Knowledge, Minesweeper, MinesweeperAI
+
+
+def grid_size(grid):
+    """
+    Returns the bytes used by a board-shaped grid of rows.
+    """
+    if hasattr(grid, "nbytes"):
+        return sys.getsizeof(grid)
+    return sys.getsizeof(grid) + sum(sys.getsizeof(row) for row in grid)
+
+
+def traced(build):
+    """
+    Returns the bytes still allocated after calling `build`,
+    along with what it built.
+    """
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    built = build()
+    size = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return size, built
+
+
+def memory(height, width, mines, sentences):
+    """
+    Measures bytes per cell of the board and neighbor-count grid,
+    and bytes per sentence on their own and inside Knowledge.
+    """
+    game = Minesweeper(height=height, width=width, mines=mines, seed=0)
+    cells = height * width
+
+    # Sentences over random 3x3 neighborhoods, as the AI builds them
+    rng = random.Random(0)
+    specs = []
+    for _ in range(sentences):
+        i, j = rng.randrange(height - 2), rng.randrange(width - 2)
+        neighbors = [(i + d_row, j + d_col) for d_row in range(3) for d_col in range(3)]
+        cells_in = rng.sample(neighbors, rng.randint(2, 8))
+        specs.append((cells_in, rng.randint(1, len(cells_in) - 1)))
+
+    bare, _ = traced(lambda: [BitSentence.from_cells(c, n, width) for c, n in specs])
+
+    def build_knowledge():
+        knowledge = Knowledge(width)
+        for c, n in specs:
+            knowledge.add(BitSentence.from_cells(c, n, width))
+        return knowledge
+
+    stored, knowledge = traced(build_knowledge)
+
+    return {
+        "board": grid_size(game.board) / cells,
+        "counts": grid_size(game.counts) / cells,
+        "sentence": bare / sentences,
+        "stored_sentence": stored / len(knowledge),
+    }
+
+
+def speed(height, width, mines, games):
+    """
+    Plays `games` games one cell at a time and measures the average
+    time of each add_knowledge and make_random_move call, in seconds.
+    """
+    timings = {"add_knowledge": [0, 0.0], "make_random_move": [0, 0.0]}
+
+    def timed(name, call, *args):
+        start = time.perf_counter()
+        result = call(*args)
+        timings[name][1] += time.perf_counter() - start
+        timings[name][0] += 1
+        return result
+
+    for seed in range(games):
+        game = Minesweeper(height=height, width=width, mines=mines, seed=seed)
+        ai = MinesweeperAI(height=height, width=width, seed=seed + games)
+        while True:
+            move = ai.make_safe_move()
+            if move is None:
+                move = timed("make_random_move", ai.make_random_move)
+            if move is None or game.is_mine(move):
+                break
+            timed("add_knowledge", ai.add_knowledge, move, game.nearby_mines(move))
+
+    return {name: total / calls if calls else 0.0 for name, (calls, total) in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Minesweeper engine.")
+    parser.add_argument("benchmark", choices=["memory", "speed"])
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--mines", type=int)
+    parser.add_argument("--sentences", type=int, default=100000)
+    parser.add_argument("--games", type=int, default=200)
+    args = parser.parse_args()
+
+    # Memory is measured on a huge board, speed on expert-sized games
+    defaults = (1000, 1000, 150000) if args.benchmark == "memory" else (16, 30, 99)
+    args.height = args.height or defaults[0]
+    args.width = args.width or defaults[1]
+    args.mines = args.mines if args.mines is not None else defaults[2]
+
+    if args.benchmark == "memory":
+        stats = memory(args.height, args.width, args.mines, args.sentences)
+        print(f"Board: {stats['board']:.2f} bytes per cell")
+        print(f"Neighbor counts: {stats['counts']:.2f} bytes per cell")
+        print(f"Sentence: {stats['sentence']:.1f} bytes")
+        print(f"Sentence in knowledge: {stats['stored_sentence']:.1f} bytes")
+    elif args.benchmark == "speed":
+        stats = speed(args.height, args.width, args.mines, args.games)
+        print(f"add_knowledge: {stats['add_knowledge'] * 1e6:.1f} us per call")
+        print(f"make_random_move: {stats['make_random_move'] * 1e6:.1f} us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Consistency checks for the Minesweeper AI.
+
+Usage: python check.py lazy|streaming [--games N] [--seed S]
+"""
+
+import argparse
+import random
+import sys
+
+from minesweeper import Minesweeper, MinesweeperAI
+from simulate import PRESETS, play_game
+
+# AI options the lazy mode must not change the outcome for. The exact
+# solver is left out: it skips components larger than max_component,
+# so what it settles depends on when it runs.
+LAZY_OPTIONS = {
+    "plain": {},
+    "linear": {"linear": True},
+    "probability": {"guess": "probability"},
+    "linear, probability": {"linear": True, "guess": "probability"},
+}
+
+
+def check_lazy(games, seed=None):
+    """
+    Replays the same expert boards and AI seeds with eager and lazy
+    inference, and returns (options, game) for every game whose result
+    or number of guesses differs.
+    """
+    height, width, mines = PRESETS["expert"]
+    failures = []
+    for name, ai_options in LAZY_OPTIONS.items():
+        rng = random.Random(seed)
+        for game in range(games):
+            board_seed, ai_seed = rng.getrandbits(64), rng.getrandbits(64)
+            eager = play_game(height, width, mines, board_seed, ai_seed, None, ai_options)
+            lazy = play_game(height, width, mines, board_seed, ai_seed, None,
+                             dict(ai_options, lazy=True))
+            if (eager["won"], eager["guesses"]) != (lazy["won"], lazy["guesses"]):
+                failures.append((name, game))
+    return failures
+
+
+def check_streaming(games, seed=None):
+    """
+    Plays expert games through deductions(), playing every safe cell
+    with add_knowledge_batch as soon as it is yielded, while the stream
+    is paused. Returns the number of cells known to be mines, or known
+    to be safe without having been revealed, that no stream yielded.
+    """
+    height, width, mines = PRESETS["expert"]
+    rng = random.Random(seed)
+    missed = 0
+    for _ in range(games):
+        game = Minesweeper(height=height, width=width, mines=mines, seed=rng.getrandbits(64),
+                           first_click_safe=True)
+        ai = MinesweeperAI(height=height, width=width, seed=rng.getrandbits(64))
+        yielded = set()
+        revealed = set()
+
+        def reveal(cell):
+            game.generate(cell)
+            if game.is_mine(cell):
+                return None
+            uncovered = game.reveal(cell)
+            revealed.update(c for c, _ in uncovered)
+            return uncovered
+
+        lost = False
+        while not lost:
+            move = ai.make_safe_move() or ai.make_random_move()
+            uncovered = reveal(move) if move is not None else None
+            if uncovered is None:
+                break
+            for kind, cell in ai.deductions(uncovered):
+                yielded.add(cell)
+                if kind == "safe" and cell not in revealed:
+                    nested = reveal(cell)
+                    if nested is None:
+                        lost = True
+                        break
+                    ai.add_knowledge_batch(nested)
+
+        missed += len(ai.mines - yielded) + len(ai.safes - yielded - revealed)
+    return missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the Minesweeper AI for consistency.")
+    parser.add_argument("check", choices=["lazy", "streaming"])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.check == "lazy":
+        failures = check_lazy(args.games, args.seed)
+        for name, game in failures:
+            print(f"Lazy and eager differ: {name}, game {game}")
+        print(f"{len(failures)} differing games out of {args.games * len(LAZY_OPTIONS)}")
+    elif args.check == "streaming":
+        failures = check_streaming(args.games, args.seed)
+        print(f"{failures} known cells never yielded in {args.games} games")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
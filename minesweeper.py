@@ -1,5 +1,98 @@
+import functools
 import itertools
+import math
 import random
+import time
+from array import array
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def bits(mask):
+    """
+    Yields the index of every set bit in a bitboard, lowest first.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class NeighborTable():
+    """
+    Precomputed adjacency of a height x width board in CSR form:
+    the neighbors of flat index i * width + j are stored in `ids`
+    between `offsets[index]` and `offsets[index + 1]`.
+
+    The table is built on first use, so boards that never look
+    up a neighbor, like NumPy boards that are not played, skip it.
+    """
+
+    __slots__ = ("height", "width", "offsets", "ids")
+
+    def __init__(self, height, width):
+        self.height = height
+        self.width = width
+        self.offsets = None
+        self.ids = None
+
+    def build(self):
+        """
+        Fills in `offsets` and `ids`. Every row is a copy of the row
+        at the top, middle or bottom of the board, shifted by its
+        first index, so only those rows are worked out cell by cell.
+        """
+        height, width = self.height, self.width
+        offsets = array("l", [0])
+        ids = array("l")
+        rows = {}
+        for i in range(height):
+            above, below = i > 0, i < height - 1
+            if (above, below) not in rows:
+                rows[above, below] = self.row(above, below)
+            row_ids, row_offsets = rows[above, below]
+            offsets.extend(map(len(ids).__add__, row_offsets))
+            ids.extend(map((i * width).__add__, row_ids))
+        self.offsets = offsets
+        self.ids = ids
+
+    def row(self, above, below):
+        """
+        Returns (ids, offsets) for the neighbors of a row starting at
+        index 0, with or without a row above and below it.
+        """
+        width = self.width
+        ids = []
+        offsets = []
+        d_rows = [d_row for d_row, present in ((-1, above), (0, True), (1, below)) if present]
+        for j in range(width):
+            lo, hi = max(j - 1, 0), min(j + 2, width)
+            for d_row in d_rows:
+                ids.extend(d_row * width + col for col in range(lo, hi)
+                           if d_row or col != j)
+            offsets.append(len(ids))
+        return ids, offsets
+
+    def __getitem__(self, index):
+        """
+        Returns the flat indices of the neighbors of flat index `index`.
+        """
+        if self.ids is None:
+            self.build()
+        return self.ids[self.offsets[index]:self.offsets[index + 1]]
+
+
+@functools.lru_cache(maxsize=8)
+def neighbor_table(height, width):
+    """
+    Returns the NeighborTable for boards of the given size, built
+    once and shared by every game and AI of those dimensions.
+    """
+    return NeighborTable(height, width)
 
 
 class Minesweeper():
@@ -7,31 +100,196 @@ class Minesweeper():
     Minesweeper game representation
     """
 
-    def __init__(self, height=8, width=8, mines=8):
+    __slots__ = (
+        "height", "width", "neighbors", "mines", "mine_count", "rng", "mine_mask",
+        "use_numpy", "board", "counts", "first_click_safe", "safe_neighborhood", "no_guess",
+        "max_attempts", "generated", "generation_stats", "mines_found", "revealed",
+    )
+
+    def __init__(self, height=8, width=8, mines=8, use_numpy=False, seed=None, rng=None,
+                 first_click_safe=False, safe_neighborhood=False, no_guess=False,
+                 max_attempts=1000):
 
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
         self.mines = set()
+        self.mine_count = mines
+        if not 0 <= mines <= height * width:
+            raise ValueError("mines must be between 0 and height * width")
 
-        # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
-
-        # At first, player has found no mines
+        # Neighbors of every cell, shared with other boards of the same size
+        self.neighbors = neighbor_table(height, width)
+
+        # Random number generator used to place mines, seeded for reproducible boards
+        self.rng = rng if rng is not None else random.Random(seed)
+
+        # Bitboard of mine locations, bit i * width + j set for a mine at (i, j)
+        self.mine_mask = 0
+
+        # Initialize an empty field with no mines, optionally as a NumPy array
+        if use_numpy and np is None:
+            raise ImportError("NumPy is required for use_numpy=True")
+        self.use_numpy = use_numpy
+        self.clear()
+
+        # Mines are placed right away, unless the first revealed cell must be
+        # safe, in which case placement waits for generate(first_cell).
+        # A no-guess board also needs the first cell, to check that the
+        # AI can solve it from there without guessing.
+        self.first_click_safe = first_click_safe or no_guess
+        self.safe_neighborhood = safe_neighborhood
+        self.no_guess = no_guess
+        self.max_attempts = max_attempts
+        self.generated = False
+        self.generation_stats = {"attempts": 0, "time": 0.0, "no_guess": False}
+        if not self.first_click_safe:
+            self.generate()
+
+        # At first, player has found no mines and revealed no cells;
+        # revealed[i * width + j] is set once cell (i, j) is revealed
         self.mines_found = set()
+        self.revealed = bytearray(height * width)
+
+    def clear(self):
+        """
+        Removes every mine from the board.
+        """
+        if self.use_numpy:
+            self.board = np.zeros((self.height, self.width), dtype=bool)
+        else:
+            self.board = [bytearray(self.width) for _ in range(self.height)]
+        self.mines = set()
+        self.mine_mask = 0
+        self.counts = self.count_mines()
+
+    def generate(self, first_cell=None):
+        """
+        Places the mines if that has not happened yet, and
+        does nothing otherwise.
+
+        In first-click-safe mode `first_cell` (and its neighbors, with
+        `safe_neighborhood`) never holds a mine. In no-guess mode boards
+        are regenerated, up to `max_attempts` times, until the AI can
+        clear the board from `first_cell` using only safe moves.
+        Attempts and time spent are recorded in `generation_stats`.
+        """
+        if self.generated:
+            return
+        start = time.perf_counter()
+
+        excluded = set()
+        if self.first_click_safe and first_cell is not None:
+            i, j = first_cell
+            excluded.add(i * self.width + j)
+            if self.safe_neighborhood:
+                excluded.update(self.neighbors[i * self.width + j])
+                # Fall back to a safe first cell when the neighborhood does not fit
+                if self.height * self.width - len(excluded) < self.mine_count:
+                    excluded = {i * self.width + j}
+
+        attempts = 0
+        solved = False
+        while True:
+            attempts += 1
+            if attempts > 1:
+                self.clear()
+            self.place_mines(self.sample_mines(self.mine_count, excluded))
+            if not self.no_guess or first_cell is None:
+                break
+            solved = self.solvable(first_cell)
+            if solved or attempts >= self.max_attempts:
+                break
+
+        self.generated = True
+        self.generation_stats = {
+            "attempts": attempts,
+            "time": time.perf_counter() - start,
+            "no_guess": solved,
+        }
+
+    def sample_mines(self, mines, excluded=()):
+        """
+        Returns `mines` distinct flat indices i * width + j, chosen
+        uniformly at random among the cells not in `excluded`.
+        """
+        cells = self.height * self.width
+        available = cells - len(excluded)
+        if not 0 <= mines <= available:
+            raise ValueError("not enough cells to place mines")
+
+        # Sample positions in range(available), mapping positions that
+        # are excluded cells onto the allowed cells above `available`
+        remap = dict(zip(
+            sorted(index for index in excluded if index < available),
+            [index for index in range(available, cells) if index not in excluded],
+        ))
+
+        # On dense boards it is cheaper to sample the safe cells instead
+        if mines <= available // 2:
+            picks = self.rng.sample(range(available), mines)
+        else:
+            safe = set(self.rng.sample(range(available), available - mines))
+            picks = [index for index in range(available) if index not in safe]
+        return [remap.get(index, index) for index in picks]
+
+    def solvable(self, first_cell):
+        """
+        Checks whether the AI clears the board starting from
+        `first_cell` without ever making a random move.
+        """
+        ai = MinesweeperAI(height=self.height, width=self.width)
+        safe_cells = self.height * self.width - len(self.mines)
+        move = first_cell
+        while move is not None:
+            ai.add_knowledge(move, self.nearby_mines(move))
+            if len(ai.made_ids) == safe_cells:
+                return True
+            move = ai.make_safe_move()
+        return False
+
+    def place_mines(self, indices):
+        """
+        Places mines at the given flat indices i * width + j
+        and computes the neighboring mine counts.
+        """
+        indices = list(indices)
+        mask = bytearray((self.height * self.width + 7) // 8)
+        for index in indices:
+            mask[index >> 3] |= 1 << (index & 7)
+        self.mine_mask = int.from_bytes(mask, "little")
+
+        self.mines = {divmod(index, self.width) for index in indices}
+        if self.use_numpy:
+            self.board.reshape(-1)[indices] = True
+        else:
+            for i, j in self.mines:
+                self.board[i][j] = 1
+
+        # Number of neighboring mines for every cell on the board
+        self.counts = self.count_mines()
+
+    def count_mines(self):
+        """
+        Returns the grid of neighboring mine counts for the whole board.
+
+        With a NumPy board this is a shifted sum over the padded field;
+        otherwise each mine increments the counts of its neighbors.
+        """
+        if self.use_numpy:
+            padded = np.pad(self.board, 1).astype(np.uint8)
+            counts = np.zeros((self.height, self.width), dtype=np.uint8)
+            for d_row in range(3):
+                for d_col in range(3):
+                    if (d_row, d_col) != (1, 1):
+                        counts += padded[d_row:d_row + self.height, d_col:d_col + self.width]
+            return counts
+
+        flat = bytearray(self.height * self.width)
+        for i, j in self.mines:
+            for index in self.neighbors[i * self.width + j]:
+                flat[index] += 1
+        return [flat[row:row + self.width] for row in range(0, len(flat), self.width)]
 
     def print(self):
         """
@@ -50,7 +308,7 @@ class Minesweeper():
 
     def is_mine(self, cell):
         i, j = cell
-        return self.board[i][j]
+        return bool(self.mine_mask >> (i * self.width + j) & 1)
 
     def nearby_mines(self, cell):
         """
@@ -59,29 +317,49 @@ class Minesweeper():
         not including the cell itself.
         """
 
-        # Keep count of nearby mines
-        count = 0
+        i, j = cell
+        return int(self.counts[i][j])
 
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
+    def reveal(self, cell):
+        """
+        Reveals a safe cell and, if it has no neighboring mines,
+        flood-fills outwards through the connected region of zero
+        cells and its border.
 
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
+        Returns a list of (cell, count) pairs for every newly
+        revealed cell, in the order they were uncovered. Returns
+        an empty list if the cell is a mine or already revealed.
+        """
+        self.generate(cell)
+        start = cell[0] * self.width + cell[1]
+        if self.revealed[start] or self.is_mine(cell):
+            return []
 
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
+        revealed = self.revealed
+        revealed[start] = 1
+        uncovered = []
+        queue = deque([start])
+        while queue:
+            index = queue.popleft()
+            i, j = divmod(index, self.width)
+            count = int(self.counts[i][j])
+            uncovered.append(((i, j), count))
+            if count != 0:
+                continue
 
-        return count
+            # No neighbor is a mine, so all of them can be revealed
+            for neighbor in self.neighbors[index]:
+                if not revealed[neighbor]:
+                    revealed[neighbor] = 1
+                    queue.append(neighbor)
+        return uncovered
 
     def won(self):
         """
-        Checks if all mines have been flagged.
+        Checks if all mines have been flagged. A board whose mines
+        have not been placed yet has not been won.
         """
-        return self.mines_found == self.mines
+        return self.generated and self.mines_found == self.mines
 
 
 class Sentence():
@@ -91,13 +369,28 @@ class Sentence():
     and a count of the number of those cells which are mines.
     """
 
+    __slots__ = ("cells", "count")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = frozenset(cells)
         self.count = count
 
     def __eq__(self, other):
+        # A Sentence and a BitSentence never compare equal, as their keys differ
+        if type(other) is not type(self):
+            return NotImplemented
         return self.cells == other.cells and self.count == other.count
 
+    # Sentences change when cells are marked, so they are not hashable
+    # themselves; they are stored under their key() instead
+    __hash__ = None
+
+    def key(self):
+        """
+        Returns the canonical, hashable form of the sentence.
+        """
+        return (self.cells, self.count)
+
     def __str__(self):
         return f"{self.cells} = {self.count}"
 
@@ -128,7 +421,7 @@ class Sentence():
         """
         # TODO
         if cell in self.cells:  # No need to loop since set ensures unique value
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
             self.count -= 1
 
     def mark_safe(self, cell):
@@ -138,7 +431,446 @@ class Sentence():
         """
         # TODO
         if cell in self.cells:
-            self.cells.remove(cell)
+            self.cells = self.cells - {cell}
+
+
+class BitSentence():
+    """
+    Sentence whose cells are stored as a bitboard, with bit
+    i * width + j - low set when cell (i, j) is part of the sentence.
+
+    The mask is kept shifted down to its lowest cell, `low`, so it
+    stays a small integer however large the board is. Once two masks
+    are aligned, subset tests, differences and counts are single
+    integer operations. The board width is not stored, to keep every
+    sentence small; from_cells and to_sentence convert from and to
+    the (i, j) cells of a Sentence given the width.
+    """
+
+    __slots__ = ("mask", "low", "count")
+
+    def __init__(self, mask, count, low=0):
+        self.mask, self.low = self.normalize(mask, low)
+        self.count = count
+
+    @staticmethod
+    def normalize(mask, low):
+        """
+        Returns (mask, low) with the mask shifted so that its lowest set bit is bit 0.
+        """
+        if not mask:
+            return mask, low
+        shift = (mask & -mask).bit_length() - 1
+        return mask >> shift, low + shift
+
+    @classmethod
+    def from_cells(cls, cells, count, width):
+        """
+        Builds a sentence from (i, j) cells on a board of the given width.
+        """
+        return cls.from_ids([i * width + j for i, j in cells], count)
+
+    @classmethod
+    def from_ids(cls, ids, count):
+        """
+        Builds a sentence from flat cell indices i * width + j.
+        """
+        low = min(ids, default=0)
+        mask = 0
+        for bit in ids:
+            mask |= 1 << (bit - low)
+        return cls(mask, count, low)
+
+    def to_sentence(self, width):
+        """
+        Returns the equivalent Sentence over (i, j) cells on a board of the given width.
+        """
+        return Sentence((divmod(bit, width) for bit in self.ids()), self.count)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.key() == other.key()
+
+    # Knowledge.mark clears bits in place, so like Sentence this is unhashable
+    __hash__ = None
+
+    def key(self):
+        """
+        Returns the canonical, hashable form of the sentence.
+        """
+        return (self.low, self.mask, self.count)
+
+    def __str__(self):
+        return f"{set(self.ids())} = {self.count}"
+
+    def ids(self):
+        """
+        Yields the flat index i * width + j of every cell, lowest first.
+        """
+        low = self.low
+        for bit in bits(self.mask):
+            yield low + bit
+
+    def clear(self, bit):
+        """
+        Removes the cell with flat index `bit`, returning whether it was there.
+        """
+        offset = bit - self.low
+        if offset < 0 or not self.mask >> offset & 1:
+            return False
+        self.mask ^= 1 << offset
+        if offset == 0:
+            self.mask, self.low = self.normalize(self.mask, self.low)
+        return True
+
+
+class Knowledge():
+    """
+    Collection of bitboard sentences known to be true, keyed by
+    their canonical form, with an index from each bit (cell) to
+    the keys of the sentences that contain it.
+
+    Sentences are also partitioned into frontier components with
+    a union-find over their cells: sentences in different components
+    share no cells, so they can never produce an inference together.
+    Components only merge while they have sentences, so one may
+    cover sentences that stopped sharing cells after some were
+    resolved, unless components() is asked to split it; it is
+    dropped once its last sentence is removed.
+
+    Given the board width, it also answers for Sentence objects
+    over (i, j) cells, and yields its sentences in that form.
+    """
+
+    __slots__ = ("width", "sentences", "index", "parent", "members", "extent", "stats")
+
+    def __init__(self, width=None):
+        # Board width, needed only to convert to and from (i, j) cells
+        self.width = width
+
+        self.sentences = {}
+        self.index = {}
+
+        # Union-find over bits, and for each root the keys of its
+        # sentences and the list of every bit it has covered
+        self.parent = {}
+        self.members = {}
+        self.extent = {}
+
+        # Running totals of sentences stored, re-keyed in place and dropped
+        self.stats = {"added": 0, "rekeyed": 0, "dropped": 0}
+
+    def __iter__(self):
+        return iter(self.sentences.values())
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __contains__(self, sentence):
+        if isinstance(sentence, Sentence):
+            if self.width is None:
+                raise TypeError("Knowledge needs a width to look up a Sentence")
+            sentence = BitSentence.from_cells(sentence.cells, sentence.count, self.width)
+        elif not isinstance(sentence, BitSentence):
+            raise TypeError(f"cannot look up {type(sentence).__name__} in Knowledge")
+        return sentence.key() in self.sentences
+
+    def cell_sentences(self):
+        """
+        Yields a Sentence over (i, j) cells for every sentence stored;
+        changing them does not change the knowledge.
+        """
+        if self.width is None:
+            raise TypeError("Knowledge needs a width to build Sentence objects")
+        for sentence in self.sentences.values():
+            yield sentence.to_sentence(self.width)
+
+    def get(self, key):
+        """
+        Returns the sentence stored under a key, or None.
+        """
+        return self.sentences.get(key)
+
+    def add(self, sentence):
+        """
+        Adds a sentence, indexes it under each of its bits and
+        merges the components it connects.
+
+        Returns False, leaving the knowledge unchanged, if the
+        sentence is empty or an equal sentence is already known.
+        """
+        key = sentence.key()
+        if not sentence.mask or key in self.sentences:
+            return False
+        self.sentences[key] = sentence
+        for bit in sentence.ids():
+            self.index.setdefault(bit, set()).add(key)
+        self.members[self.union(sentence.ids())].add(key)
+        self.stats["added"] += 1
+        return True
+
+    def drop_component(self, root):
+        """
+        Forgets a component that has no sentences left.
+        """
+        del self.members[root]
+        for bit in self.extent.pop(root):
+            del self.parent[bit]
+
+    def find(self, bit):
+        """
+        Returns the root of the component containing a bit.
+        """
+        root = bit
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[bit] != root:
+            self.parent[bit], bit = root, self.parent[bit]
+        return root
+
+    def union(self, ids):
+        """
+        Merges the components of the given bits, creating
+        components for new bits, and returns the resulting root.
+        """
+        roots = set()
+        for bit in ids:
+            if bit not in self.parent:
+                self.parent[bit] = bit
+                self.members[bit] = set()
+                self.extent[bit] = [bit]
+            roots.add(self.find(bit))
+
+        # Merge the smaller components into the largest one
+        root = max(roots, key=lambda r: len(self.members[r]))
+        for other in roots:
+            if other != root:
+                self.parent[other] = root
+                self.members[root].update(self.members.pop(other))
+                self.extent[root].extend(self.extent.pop(other))
+        return root
+
+    def components(self, connected=False):
+        """
+        Returns the sentences grouped by component.
+
+        With `connected`, each component is also split along the cells
+        its sentences still share, so the grouping depends only on the
+        sentences known now and not on the order they were added and
+        resolved in.
+        """
+        if not connected:
+            return [[self.sentences[key] for key in keys] for keys in self.members.values()]
+        groups = []
+        for members in self.members.values():
+            left = set(members)
+            while left:
+                key = left.pop()
+                group = [key]
+                stack = [key]
+                while stack:
+                    for bit in self.sentences[stack.pop()].ids():
+                        for other in self.index[bit]:
+                            if other in left:
+                                left.remove(other)
+                                group.append(other)
+                                stack.append(other)
+                groups.append([self.sentences[key] for key in group])
+        return groups
+
+    def overlapping(self, sentence):
+        """
+        Returns the other sentences sharing at least one bit with `sentence`.
+        """
+        keys = set()
+        for bit in sentence.ids():
+            keys.update(self.index.get(bit, ()))
+        keys.discard(sentence.key())
+        return [self.sentences[key] for key in keys]
+
+    def mark(self, bit, mine):
+        """
+        Clears a bit known to be a mine (or safe) from every
+        sentence containing it, re-keying those sentences.
+
+        Sentences are updated in place and keep their component;
+        those that become empty or duplicate another one are dropped.
+        Returns the sentences that changed and are still known.
+        """
+        keys = self.index.pop(bit, None)
+        if not keys:
+            return []
+        root = self.find(bit)
+        members = self.members[root]
+        changed = []
+        for key in keys:
+            sentence = self.sentences.pop(key)
+            members.discard(key)
+            sentence.clear(bit)
+            if mine:
+                sentence.count -= 1
+
+            new_key = sentence.key()
+            if sentence.mask and new_key not in self.sentences:
+                self.sentences[new_key] = sentence
+                members.add(new_key)
+                for other in sentence.ids():
+                    others = self.index[other]
+                    others.discard(key)
+                    others.add(new_key)
+                changed.append(sentence)
+                self.stats["rekeyed"] += 1
+            else:
+                for other in sentence.ids():
+                    others = self.index[other]
+                    others.discard(key)
+                    if not others:
+                        del self.index[other]
+                self.stats["dropped"] += 1
+        if not members:
+            self.drop_component(root)
+        return changed
+
+
+def enumerate_component(sentences):
+    """
+    Enumerates every assignment of mines to the cells of `sentences`
+    that is consistent with all of their counts, by backtracking
+    cell by cell and pruning as soon as a sentence has too many
+    mines or too few cells left to reach its count.
+
+    Returns (cells, tallies): the bits involved, and a dict mapping
+    a number of mines k to a pair [solutions, counts] where solutions
+    is how many consistent assignments place exactly k mines and
+    counts[i] is in how many of those cells[i] is a mine.
+    """
+    # Order cells sentence by sentence so that constraints close early
+    cells = []
+    position = {}
+    for sentence in sentences:
+        for bit in sentence.ids():
+            if bit not in position:
+                position[bit] = len(cells)
+                cells.append(bit)
+    touching = [[] for _ in cells]
+    for s, sentence in enumerate(sentences):
+        for bit in sentence.ids():
+            touching[position[bit]].append(s)
+
+    # Mines each sentence still needs, and its cells still unassigned
+    need = [sentence.count for sentence in sentences]
+    room = [sentence.mask.bit_count() for sentence in sentences]
+    assignment = [0] * len(cells)
+    tallies = {}
+
+    def search(i, placed):
+        if i == len(cells):
+            entry = tallies.setdefault(placed, [0, [0] * len(cells)])
+            entry[0] += 1
+            for c, value in enumerate(assignment):
+                entry[1][c] += value
+            return
+        for value in (0, 1):
+            consistent = True
+            for s in touching[i]:
+                need[s] -= value
+                room[s] -= 1
+                if need[s] < 0 or need[s] > room[s]:
+                    consistent = False
+            if consistent:
+                assignment[i] = value
+                search(i + 1, placed + value)
+            for s in touching[i]:
+                need[s] += value
+                room[s] += 1
+        assignment[i] = 0
+
+    search(0, 0)
+    return cells, tallies
+
+
+def reduce_component(sentences):
+    """
+    Reads the sentences of a component as linear equations, the sum
+    of the 0/1 mine variables of their cells equal to their count,
+    and reduces them with fraction-free Gauss-Jordan elimination.
+
+    Every equation, original or reduced, is then bounded: a cell is
+    forced when only one of its values leaves the smallest and largest
+    sums of the other terms able to reach the right-hand side. So is
+    the difference of every two overlapping sentences, which a single
+    elimination pass does not always produce once a component holds
+    more than those two sentences.
+
+    Returns (safes, mines), the sets of bits forced to 0 and to 1.
+    """
+    rows = [({bit: 1 for bit in sentence.ids()}, sentence.count) for sentence in sentences]
+    equations = list(rows)
+
+    # Differences of overlapping sentences
+    containing = {}
+    for r, (coeffs, _) in enumerate(rows):
+        for bit in coeffs:
+            containing.setdefault(bit, []).append(r)
+    pairs = set()
+    for members in containing.values():
+        pairs.update(itertools.combinations(members, 2))
+    for a, b in pairs:
+        (a_coeffs, a_rhs), (b_coeffs, b_rhs) = rows[a], rows[b]
+        difference = {bit: 1 for bit in a_coeffs.keys() - b_coeffs.keys()}
+        difference.update({bit: -1 for bit in b_coeffs.keys() - a_coeffs.keys()})
+        equations.append((difference, a_rhs - b_rhs))
+
+    # Gauss-Jordan elimination with integer rows, normalized by their gcd
+    columns = set()
+    for coeffs, _ in rows:
+        columns.update(coeffs)
+    pivot = 0
+    for column in sorted(columns):
+        for r in range(pivot, len(rows)):
+            if column in rows[r][0]:
+                break
+        else:
+            continue
+        rows[pivot], rows[r] = rows[r], rows[pivot]
+        pivot_coeffs, pivot_rhs = rows[pivot]
+        p = pivot_coeffs[column]
+        for r in range(len(rows)):
+            coeffs, rhs = rows[r]
+            if r == pivot or column not in coeffs:
+                continue
+            c = coeffs[column]
+            reduced = {}
+            for bit in coeffs.keys() | pivot_coeffs.keys():
+                value = coeffs.get(bit, 0) * p - pivot_coeffs.get(bit, 0) * c
+                if value:
+                    reduced[bit] = value
+            rhs = rhs * p - pivot_rhs * c
+            divisor = math.gcd(rhs, *reduced.values())
+            if divisor > 1:
+                reduced = {bit: value // divisor for bit, value in reduced.items()}
+                rhs //= divisor
+            rows[r] = (reduced, rhs)
+        pivot += 1
+    equations.extend(rows)
+
+    # Bounds reasoning on every equation
+    safes = set()
+    mines = set()
+    for coeffs, rhs in equations:
+        low = sum(c for c in coeffs.values() if c < 0)
+        high = sum(c for c in coeffs.values() if c > 0)
+        for bit, c in coeffs.items():
+            others_low = low - min(c, 0)
+            others_high = high - max(c, 0)
+            zero = others_low <= rhs <= others_high
+            one = others_low + c <= rhs <= others_high + c
+            if zero and not one:
+                safes.add(bit)
+            elif one and not zero:
+                mines.add(bit)
+    return safes, mines
 
 
 class MinesweeperAI():
@@ -146,39 +878,150 @@ class MinesweeperAI():
     Minesweeper game player
     """
 
-    def __init__(self, height=8, width=8):
+    __slots__ = (
+        "height", "width", "neighbors", "guess", "total_mines", "exact", "max_component",
+        "solver_stats", "settled", "linear", "linear_stats", "reduced", "rng",
+        "made_ids", "mine_ids", "safe_ids", "knowledge", "move_stats", "unexplored",
+        "position", "ranks", "safe_queue", "lazy", "deferred", "unsolved", "found", "streams",
+    )
+
+    def __init__(self, height=8, width=8, seed=None, rng=None, exact=False, max_component=24,
+                 guess="random", total_mines=None, linear=False, lazy=False):
 
         # Set initial height and width
         self.height = height
         self.width = width
 
+        # Neighbors of every cell, shared with boards of the same size
+        self.neighbors = neighbor_table(height, width)
+
+        # How to pick a move when none is known to be safe: "random" picks
+        # uniformly, "probability" picks the cell least likely to be a mine,
+        # which is more accurate when the total number of mines is known
+        if guess not in ("random", "probability"):
+            raise ValueError("guess must be 'random' or 'probability'")
+        self.guess = guess
+        self.total_mines = total_mines
+
+        # Optional exact solver for frontier components of at most
+        # `max_component` cells, with the time and work it has spent
+        self.exact = exact
+        self.max_component = max_component
+        self.solver_stats = {"runs": 0, "components": 0, "skipped": 0, "solutions": 0, "time": 0.0}
+        self.settled = set()
+
+        # Optional linear inference over frontier components, with its cost
+        self.linear = linear
+        self.linear_stats = {"runs": 0, "components": 0, "time": 0.0}
+        self.reduced = set()
+
+        # Random number generator used for random moves
+        self.rng = rng if rng is not None else random.Random(seed)
+
+        # Cells are tracked internally by flat index i * width + j and only
+        # converted to (i, j) tuples by the public methods and properties
+
         # Keep track of which cells have been clicked on
-        self.moves_made = set()
+        self.made_ids = set()
 
         # Keep track of cells known to be safe or mines
-        self.mines = set()
-        self.safes = set()
+        self.mine_ids = set()
+        self.safe_ids = set()
+
+        # Sentences about the game known to be true
+        self.knowledge = Knowledge(width)
+
+        # Sentence objects allocated, re-keyed in place and dropped by the last
+        # move, or by the last deferred inference in lazy mode
+        self.move_stats = {"allocated": 0, "rekeyed": 0, "dropped": 0}
+
+        # Cells not chosen yet and not known to be mines, with the position
+        # of each in the list (-1 once removed), so one can be removed or
+        # picked in O(1)
+        self.unexplored = list(range(height * width))
+        self.position = array("l", self.unexplored)
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Fenwick tree over the cells still unexplored, in flat index order,
+        # so the k-th one can be found in O(log n) whatever the pool's order
+        self.ranks = array("l", (n & -n for n in range(height * width + 1)))
+
+        # Cells known to be safe, in the order they were found, that may not
+        # have been chosen yet; chosen ones are dropped lazily from the front
+        self.safe_queue = deque()
+
+        # In lazy mode moves are only recorded, and inference over the
+        # sentences that changed since is deferred until a safe move is needed;
+        # it finds the same cells as eager inference, except that the exact
+        # solver may skip components that grew past max_component meanwhile
+        self.lazy = lazy
+        self.deferred = []
+
+        # Whether a linear or exact solver pass is still owed, because the
+        # inference that would have ended with one was deferred or stopped
+        self.unsolved = False
+
+        # Log of the cells found safe or mines while any deductions() stream
+        # is open, as (index, mine) pairs; each stream reads it from its own
+        # position, and it is cleared once the last stream closes
+        self.found = []
+        self.streams = 0
+
+    @property
+    def moves_made(self):
+        """
+        Set of cells that have been clicked on.
+        """
+        return {divmod(index, self.width) for index in self.made_ids}
+
+    @property
+    def mines(self):
+        """
+        Set of cells known to be mines.
+        """
+        return {divmod(index, self.width) for index in self.mine_ids}
+
+    @property
+    def safes(self):
+        """
+        Set of cells known to be safe.
+        """
+        return {divmod(index, self.width) for index in self.safe_ids}
 
     def mark_mine(self, cell):
         """
         Marks a cell as a mine, and updates all knowledge
         to mark that cell as a mine as well.
+
+        Returns the sentences that changed as a result.
         """
-        self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        return self.mark_id(cell[0] * self.width + cell[1], mine=True)
 
     def mark_safe(self, cell):
         """
         Marks a cell as safe, and updates all knowledge
         to mark that cell as safe as well.
+
+        Returns the sentences that changed as a result.
         """
-        self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        return self.mark_id(cell[0] * self.width + cell[1], mine=False)
+
+    def mark_id(self, index, mine):
+        """
+        Marks the cell with flat index `index` as a mine or as safe,
+        and returns the sentences that changed as a result.
+        """
+        if mine:
+            if self.streams and index not in self.mine_ids:
+                self.found.append((index, True))
+            self.mine_ids.add(index)
+            self.remove_unexplored(index)
+        else:
+            if index not in self.safe_ids and index not in self.made_ids:
+                self.safe_queue.append(index)
+                if self.streams:
+                    self.found.append((index, False))
+            self.safe_ids.add(index)
+        return self.knowledge.mark(index, mine)
 
     def add_knowledge(self, cell, count):
         """
@@ -195,65 +1038,295 @@ class MinesweeperAI():
             5) add any new sentences to the AI's knowledge base
                if they can be inferred from existing knowledge
         """
-        #  TODO
+        self.add_knowledge_batch([(cell, count)])
+
+    def add_knowledge_batch(self, observations):
+        """
+        Adds knowledge for many revealed cells at once, given as
+        (cell, count) pairs such as those returned by Minesweeper.reveal.
+
+        Sentences for every cell are recorded first, then inference runs
+        once over everything that changed. Subset inference reaches the
+        same state as calling add_knowledge for each pair in turn; the
+        linear and exact solvers are not complete, and as they see the
+        sentences at different points they may settle different cells.
+        """
+        self.track(self.deductions(observations))
+
+    def track(self, steps):
+        """
+        Runs the generator `steps` to the end, recording in move_stats
+        the sentences allocated, re-keyed and dropped meanwhile.
+        """
+        rekeyed = self.knowledge.stats["rekeyed"]
+        dropped = self.knowledge.stats["dropped"]
+        self.move_stats["allocated"] = 0
+
+        for _ in steps:
+            pass
+
+        self.move_stats["rekeyed"] = self.knowledge.stats["rekeyed"] - rekeyed
+        self.move_stats["dropped"] = self.knowledge.stats["dropped"] - dropped
+
+    def deductions(self, observations):
+        """
+        Adds knowledge like add_knowledge_batch, yielding ("safe", cell)
+        or ("mine", cell) for every cell found along the way as soon as
+        it is marked, so a caller can act on the first safe cell while
+        inference is still running.
+
+        Every observation is recorded before the first cell is yielded.
+        If the generator is closed early, the inference left to do is
+        deferred, as in lazy mode, until make_safe_move runs out of
+        known safe cells or make_random_move is called.
+
+        The caller may play the cells it is given, even through
+        add_knowledge, while the generator is paused: cells found by
+        those nested calls are yielded here too, and cells chosen
+        since they were found are left out.
+        """
+        found = self.found
+        position = len(found)
+        self.streams += 1
+        steps = None
+        try:
+            #  1) - 3) record every move and its sentence
+            pending = []
+            for (i, j), count in observations:
+                pending.extend(self.record_move(i * self.width + j, count))
+
+            #  In lazy mode, leave the rest until a safe move is needed
+            if self.lazy:
+                self.deferred.extend(pending)
+                self.unsolved = self.unsolved or self.linear or self.exact
+            else:
+                steps = self.deduce(pending)
+
+            for _ in steps or (None,):
+                while position < len(found):
+                    index, mine = found[position]
+                    position += 1
+                    if mine or index not in self.made_ids:
+                        yield ("mine" if mine else "safe", divmod(index, self.width))
+        finally:
+            if steps is not None:
+                steps.close()
+            self.streams -= 1
+            if not self.streams:
+                found.clear()
+
+    def deduce(self, pending):
+        """
+        Runs inference from the sentences in `pending`, followed by the
+        linear and exact solvers when enabled, until nothing new is found.
+
+        Yields before the first step and after every step, so a caller
+        can stop in between; the sentences still pending when the
+        generator is closed are deferred, and so is the solver pass
+        if it has not finished.
+        """
+        pending = list(pending)
+        solved = False
+        try:
+            yield
+
+            #  4) - 5) propagate from the sentences that changed: every cell is
+            #  marked in the knowledge base once, when it is discovered, and
+            #  sentences that become all safe or all mines are applied in turn
+            #  by infer_step, along with any new sentences inferred from subsets
+            while True:
+                while pending:
+                    self.infer_step(pending)
+                    yield
+
+                #  6) settle what subset inference missed with linear elimination,
+                #     then with the exact solver, until neither finds anything new
+                if not (self.linear or self.exact):
+                    break
+                changed = self.solve_linear() if self.linear else []
+                if not changed and self.exact:
+                    changed = self.solve_exact()
+                if not changed:
+                    break
+                pending = list(changed)
+                yield
+            solved = True
+        finally:
+            self.deferred.extend(pending)
+            if not solved and (self.linear or self.exact):
+                self.unsolved = True
+
+    def flush(self):
+        """
+        Runs any inference deferred in lazy mode, or left over by
+        a deductions generator that was closed early.
+        """
+        if self.deferred or self.unsolved:
+            pending, self.deferred = self.deferred, []
+            self.unsolved = False
+            self.track(self.deduce(pending))
+
+    def record_move(self, index, count):
+        """
+        Records a safe move, given by flat index, and the number of mines
+        around it, adding a sentence about its undetermined neighbors.
+
+        Returns the list of sentences added or changed.
+        """
         #  1) mark the cell as a move that has been made
-        self.moves_made.add(cell)
-
-        #  2) mark the cell as safe
-        # self.mark_safe(cell)  # adds to self.safes & runs sentence.mark_safe on all sentences in knowledge
-        self.safes.add(cell)  # add to safes first and then mark as safe later
-
-        #  Identify neighbors
-        neighbors = set()
-        for d_row in range(-1, 2):
-            for d_col in range(-1, 2):
-                n_row = cell[0] + d_row
-                n_col = cell[1] + d_col
-                if (n_row, n_col) != cell and n_row in range(self.height) and n_col in range(self.width):
-                    neighbors.add((n_row, n_col))
-
-        # Process neighboring mines
-        count -= len(neighbors.intersection(self.mines))  # update count to reflect identified mines
-        neighbors.difference_update(self.mines)  # update neighbors to exclude identified mines
-        neighbors.difference_update(self.safes)  # update neighbors to exclude identified safes
+        self.made_ids.add(index)
+        self.remove_unexplored(index)
+
+        #  2) mark the cell as safe, removing it from any sentence mentioning it
+        pending = self.mark_id(index, mine=False)
+
+        #  Identify neighbors, leaving out identified mines and safes
+        #  and updating count to reflect identified mines
+        neighbors = []
+        for n in self.neighbors[index]:
+            if n in self.mine_ids:
+                count -= 1
+            elif n not in self.safe_ids:
+                neighbors.append(n)
         #  Case when remaining neighboring cells are mine
         if len(neighbors) == count != 0:
-            self.mines = self.mines.union(neighbors)
-            count = 0  # if all neighboring cells are mine then count should be zero
+            for n in neighbors:
+                pending.extend(self.mark_id(n, mine=True))
         #  Case when all cells are safe
-        elif neighbors != set() and count == 0:
-            self.safes = self.safes.union(neighbors)
+        elif neighbors and count == 0:
+            for n in neighbors:
+                pending.extend(self.mark_id(n, mine=False))
         #  Process neighboring cells
         else:
             #  3) add a new sentence to the AI's knowledge base
             #                based on the value of `cell` and `count`
-            new_sentence = Sentence(list(neighbors), count)
-            if new_sentence not in self.knowledge and new_sentence.cells != set():
-                self.knowledge.append(new_sentence)
-
-        #  4) mark any additional cells as safe or as mines
-        #                if it can be concluded based on the AI's knowledge base
-        safes = self.safes
-        mines = self.mines
-        #  Actually mark cells as safe or mines
-        [self.mark_safe(c) for c in safes]
-        [self.mark_mine(c) for c in mines]
-
-        #  Delete empty sets
-        self.knowledge = [x for x in self.knowledge if x.cells != set()]
-
-        #  5) add any new sentences to the AI's knowledge base
-        #                if they can be inferred from existing knowledge
-        #  Infer new knowledge based on subsets on existing sentences
-        temp_knowledge = []
-        for a in self.knowledge:
-            for b in self.knowledge:
-                if a != b:
-                    if a.cells.issubset(b.cells):
-                        temp_knowledge.append(Sentence(b.cells - a.cells, b.count - a.count))
-                    if b.cells.issubset(a.cells):
-                        temp_knowledge.append(Sentence(a.cells - b.cells, a.count - b.count))
-        [self.knowledge.append(s) for s in temp_knowledge if s not in self.knowledge]  # merge with real knowledge
+            new_sentence = BitSentence.from_ids(neighbors, count)
+            self.move_stats["allocated"] += 1
+            if self.knowledge.add(new_sentence):
+                pending.append(new_sentence)
+        return pending
+
+    def infer_step(self, pending):
+        """
+        Pops the last sentence off `pending` and infers from it, pushing
+        every sentence it derives or modifies onto `pending`.
+
+        Only sentences that share at least one cell with the popped
+        sentence are compared against it, so repeating this until
+        nothing is pending runs inference to a fixpoint while only
+        touching the part of the knowledge base that changed.
+        """
+        a = pending.pop()
+        if self.knowledge.get(a.key()) is not a:
+            return
+
+        #  A sentence that settles all of its cells is applied directly,
+        #  reading the cells straight from its mask
+        if a.count == 0 or a.count == a.mask.bit_count():
+            mine = a.count != 0
+            for bit in list(a.ids()):
+                pending.extend(self.mark_id(bit, mine))
+            return
+
+        #  Infer new knowledge based on subsets with overlapping sentences;
+        #  a sentence object is only allocated for a key not yet known
+        for b in self.knowledge.overlapping(a):
+            low = min(a.low, b.low)
+            a_mask = a.mask << (a.low - low)
+            b_mask = b.mask << (b.low - low)
+            if a_mask & ~b_mask == 0:
+                mask, count = b_mask & ~a_mask, b.count - a.count
+            elif b_mask & ~a_mask == 0:
+                mask, count = a_mask & ~b_mask, a.count - b.count
+            else:
+                continue
+            mask, low = BitSentence.normalize(mask, low)
+            if self.knowledge.get((low, mask, count)) is None:
+                new_sentence = BitSentence(mask, count, low)
+                self.move_stats["allocated"] += 1
+                self.knowledge.add(new_sentence)
+                pending.append(new_sentence)
+
+    def solve_linear(self):
+        """
+        Reduces every frontier component as a linear system with
+        reduce_component and marks the cells it forces.
+
+        Components that yielded nothing and have not changed since
+        are not reduced again. Returns the sentences that changed.
+        """
+        start = time.perf_counter()
+        stats = self.linear_stats
+        stats["runs"] += 1
+        changed = []
+        reduced = set()
+        for component in self.knowledge.components():
+            signature = frozenset(sentence.key() for sentence in component)
+            if signature in self.reduced:
+                reduced.add(signature)
+                continue
+
+            safes, mines = reduce_component(component)
+            stats["components"] += 1
+            for bit in safes:
+                changed.extend(self.mark_id(bit, mine=False))
+            for bit in mines:
+                changed.extend(self.mark_id(bit, mine=True))
+            if not safes and not mines:
+                reduced.add(signature)
+
+        self.reduced = reduced
+        stats["time"] += time.perf_counter() - start
+        return changed
+
+    def solve_exact(self):
+        """
+        Enumerates the consistent mine assignments of every frontier
+        component with at most `max_component` cells, and marks each
+        cell that is a mine in all or in none of them.
+
+        Components that yielded nothing and have not changed since
+        are not enumerated again. Returns the sentences that changed.
+        """
+        start = time.perf_counter()
+        stats = self.solver_stats
+        stats["runs"] += 1
+        changed = []
+        settled = set()
+        for component in self.knowledge.components(connected=True):
+            signature = frozenset(sentence.key() for sentence in component)
+            if signature in self.settled:
+                settled.add(signature)
+                continue
+            cells = set()
+            for sentence in component:
+                cells.update(sentence.ids())
+            if len(cells) > self.max_component:
+                stats["skipped"] += 1
+                continue
+
+            cells, tallies = enumerate_component(component)
+            solutions = sum(entry[0] for entry in tallies.values())
+            stats["components"] += 1
+            stats["solutions"] += solutions
+            if solutions == 0:
+                continue
+
+            found = False
+            for i, bit in enumerate(cells):
+                mines = sum(entry[1][i] for entry in tallies.values())
+                if mines == 0:
+                    changed.extend(self.mark_id(bit, mine=False))
+                    found = True
+                elif mines == solutions:
+                    changed.extend(self.mark_id(bit, mine=True))
+                    found = True
+            if not found:
+                settled.add(signature)
+
+        self.settled = settled
+        stats["time"] += time.perf_counter() - start
+        return changed
 
     def make_safe_move(self):
         """
@@ -263,27 +1336,229 @@ class MinesweeperAI():
 
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
+        In lazy mode, deferred inference runs here when no safe cell
+        is known yet, which may add to them.
         """
         # TODO
-        if self.safes.difference(self.moves_made):
-            for safe in self.safes.difference(self.moves_made):
-                return safe
+        while self.safe_queue and self.safe_queue[0] in self.made_ids:
+            self.safe_queue.popleft()
+        if not self.safe_queue and (self.deferred or self.unsolved):
+            self.flush()
+            while self.safe_queue and self.safe_queue[0] in self.made_ids:
+                self.safe_queue.popleft()
+        if self.safe_queue:
+            return divmod(self.safe_queue[0], self.width)
         return None
 
+    def safe_moves(self):
+        """
+        Returns every cell known to be safe that has not been
+        chosen yet, in the order the cells were found to be safe.
+        """
+        return [divmod(index, self.width) for index in self.safe_queue
+                if index not in self.made_ids]
+
     def make_random_move(self):
         """
         Returns a move to make on the Minesweeper board.
         Should choose randomly among cells that:
             1) have not already been chosen, and
             2) are not known to be mines
+
+        In "probability" guess mode the choice is made among the
+        cells least likely to be mines instead.
         """
         # TODO
-        moves_remain = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                if (i, j) not in self.moves_made and (i, j) not in self.mines:
-                    moves_remain.add((i, j))
-        if moves_remain != set():
-            return random.choice(tuple(moves_remain))
+        self.flush()
+        if self.guess == "probability":
+            return self.make_least_risky_move()
+        if self.unexplored:
+            return divmod(self.choose_unexplored(), self.width)
         else:
             return None
+
+    def choose_unexplored(self):
+        """
+        Returns the flat index of a random unexplored cell.
+
+        The order of the pool depends on the order cells were removed
+        in, so the cell is picked by its rank in flat index order
+        instead. The same unexplored cells and random state then
+        always give the same move.
+        """
+        return self.unexplored_at(self.rng.randrange(len(self.unexplored)))
+
+    def unexplored_at(self, k):
+        """
+        Returns the flat index of the unexplored cell with `k`
+        unexplored cells before it, walking down the Fenwick tree.
+        """
+        ranks = self.ranks
+        index = 0
+        step = 1 << (len(ranks) - 1).bit_length()
+        while step:
+            if index + step < len(ranks) and ranks[index + step] <= k:
+                index += step
+                k -= ranks[index]
+            step >>= 1
+        return index
+
+    def unexplored_before(self, index):
+        """
+        Returns the number of unexplored cells with a lower flat index.
+        """
+        ranks = self.ranks
+        total = 0
+        while index:
+            total += ranks[index]
+            index &= index - 1
+        return total
+
+    def remove_unexplored(self, index):
+        """
+        Removes a cell, by flat index, from the pool of unexplored cells
+        if it is there, by moving the last cell of the pool into its place.
+        """
+        n = self.position[index]
+        if n < 0:
+            return
+        self.position[index] = -1
+        index += 1
+        while index < len(self.ranks):
+            self.ranks[index] -= 1
+            index += index & -index
+        last = self.unexplored.pop()
+        if n < len(self.unexplored):
+            self.unexplored[n] = last
+            self.position[last] = n
+
+    def make_least_risky_move(self):
+        """
+        Returns a move among the cells least likely to be mines,
+        chosen randomly when several are equally likely, or None
+        if every cell has been chosen or is known to be a mine.
+        """
+        probabilities, interior = self.probabilities_by_id()
+
+        # Cells no sentence mentions all share the interior estimate; they
+        # are picked by rank among the unexplored cells, skipping the frontier,
+        # and ties are sorted, so the choice does not depend on the order of
+        # the unexplored pool or of the components
+        frontier = sorted(index for index in probabilities if self.position[index] >= 0)
+        best = min(probabilities.values(), default=None)
+        if len(self.unexplored) > len(frontier) and (
+                best is None or interior is None or interior <= best):
+            k = self.rng.randrange(len(self.unexplored) - len(frontier))
+            for index in frontier:
+                if self.unexplored_before(index) > k:
+                    break
+                k += 1
+            return divmod(self.unexplored_at(k), self.width)
+        if best is None:
+            return None
+        index = self.rng.choice(sorted(index for index, p in probabilities.items()
+                                       if p <= best + 1e-12))
+        return divmod(index, self.width)
+
+    def mine_probabilities(self):
+        """
+        Estimates the probability that each undetermined cell is a mine.
+
+        Returns (probabilities, interior) as probabilities_by_id does,
+        with the dict keyed by (i, j) cells.
+        """
+        probabilities, interior = self.probabilities_by_id()
+        return {divmod(index, self.width): p for index, p in probabilities.items()}, interior
+
+    def probabilities_by_id(self):
+        """
+        Estimates the probability that each undetermined cell is a mine.
+
+        Frontier components are enumerated exactly and, when the total
+        number of mines is known, weighted by the number of ways the
+        remaining mines fit in the cells no sentence mentions. Components
+        larger than `max_component` cells are approximated by the highest
+        mine ratio among the sentences containing each cell.
+
+        Returns (probabilities, interior): a dict from the flat index of
+        each frontier cell to its estimate, and the estimate shared by
+        all other undetermined cells, or None if it cannot be estimated.
+        """
+        probabilities = {}
+        enumerated = []
+        frontier = set()
+        approximate_mines = 0.0
+        for component in self.knowledge.components(connected=True):
+            cells = set()
+            for sentence in component:
+                cells.update(sentence.ids())
+            frontier.update(cells)
+            if len(cells) > self.max_component:
+                ratios = {}
+                for sentence in component:
+                    ratio = sentence.count / sentence.mask.bit_count()
+                    for bit in sentence.ids():
+                        ratios[bit] = max(ratio, ratios.get(bit, 0.0))
+                for bit, ratio in ratios.items():
+                    probabilities[bit] = ratio
+                    approximate_mines += ratio
+                continue
+            enumerated.append(enumerate_component(component))
+
+        # Undetermined cells that no sentence mentions
+        undetermined = self.height * self.width - len(self.mine_ids) - len(self.safe_ids)
+        interior = undetermined - len(frontier)
+        if self.total_mines is None:
+            remaining = None
+        else:
+            remaining = self.total_mines - len(self.mine_ids) - round(approximate_mines)
+
+        def weight(k):
+            # Ways to place the mines left over after k frontier mines
+            if remaining is None:
+                return 1
+            rest = remaining - k
+            return math.comb(interior, rest) if 0 <= rest <= interior else 0
+
+        def convolve(a, b):
+            ways = {}
+            for k_a, ways_a in a.items():
+                for k_b, ways_b in b.items():
+                    ways[k_a + k_b] = ways.get(k_a + k_b, 0) + ways_a * ways_b
+            return ways
+
+        # Ways to place k frontier mines, over all components before (prefix)
+        # and after (suffix) each component
+        polynomials = [{k: entry[0] for k, entry in tallies.items()} for _, tallies in enumerated]
+        prefix = [{0: 1}]
+        for polynomial in polynomials:
+            prefix.append(convolve(prefix[-1], polynomial))
+        suffix = [{0: 1}]
+        for polynomial in reversed(polynomials):
+            suffix.append(convolve(suffix[-1], polynomial))
+        suffix.reverse()
+
+        total = sum(ways * weight(k) for k, ways in prefix[-1].items())
+        if total == 0:
+            return probabilities, None
+
+        for n, (cells, tallies) in enumerate(enumerated):
+            others = convolve(prefix[n], suffix[n + 1])
+            mines = [0] * len(cells)
+            for k, (_, counts) in tallies.items():
+                factor = sum(ways * weight(k + k_other) for k_other, ways in others.items())
+                if factor:
+                    for i, count in enumerate(counts):
+                        mines[i] += count * factor
+            for i, bit in enumerate(cells):
+                probabilities[bit] = mines[i] / total
+
+        # Without a total, fall back on the average frontier estimate
+        if interior <= 0:
+            return probabilities, None
+        if remaining is None:
+            if not probabilities:
+                return probabilities, None
+            return probabilities, sum(probabilities.values()) / len(probabilities)
+        expected = sum(ways * weight(k) * (remaining - k) for k, ways in prefix[-1].items())
+        return probabilities, expected / total / interior
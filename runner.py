@@ -8,6 +8,11 @@ HEIGHT = 8
 WIDTH = 8
 MINES = 8
 
+# Board generation: keep the first revealed cell safe, or
+# only deal boards the AI can solve without guessing
+FIRST_CLICK_SAFE = False
+NO_GUESS = False
+
 # Colors
 BLACK = (0, 0, 0)
 GRAY = (180, 180, 180)
@@ -38,7 +43,8 @@ mine = pygame.image.load("assets/images/mine.png")
 mine = pygame.transform.scale(mine, (cell_size, cell_size))
 
 # Create game and AI agent
-game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES,
+                   first_click_safe=FIRST_CLICK_SAFE, no_guess=NO_GUESS)
 ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
 
 # Keep track of revealed cells, flagged cells, and if a mine was hit
@@ -153,7 +159,8 @@ while True:
     screen.blit(buttonText, buttonRect)
 
     # Display text
-    text = "Lost" if lost else "Won" if game.mines == flags else ""
+    game.mines_found = flags
+    text = "Lost" if lost else "Won" if game.won() else ""
     text = mediumFont.render(text, True, WHITE)
     textRect = text.get_rect()
     textRect.center = ((5 / 6) * width, (2 / 3) * height)
@@ -194,7 +201,8 @@ while True:
 
         # Reset game state
         elif resetButton.collidepoint(mouse):
-            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES)
+            game = Minesweeper(height=HEIGHT, width=WIDTH, mines=MINES,
+                               first_click_safe=FIRST_CLICK_SAFE, no_guess=NO_GUESS)
             ai = MinesweeperAI(height=HEIGHT, width=WIDTH)
             revealed = set()
             flags = set()
@@ -212,11 +220,12 @@ while True:
 
     # Make move and update AI knowledge
     if move:
+        game.generate(move)
         if game.is_mine(move):
             lost = True
         else:
-            nearby = game.nearby_mines(move)
-            revealed.add(move)
-            ai.add_knowledge(move, nearby)
+            uncovered = game.reveal(move)
+            revealed.update(cell for cell, _ in uncovered)
+            ai.add_knowledge_batch(uncovered)
 
     pygame.display.flip()
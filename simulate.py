@@ -0,0 +1,254 @@
+"""
+Headless batch simulation of MinesweeperAI games.
+
+Usage: python simulate.py [--preset NAME | --height H --width W --mines M]
+                          [--games N] [--workers N] [--seed S]
+"""
+
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from minesweeper import Minesweeper, MinesweeperAI
+
+# Games per shard handed to a worker; fixed so that results for a
+# given seed do not depend on the number of workers
+SHARD_SIZE = 500
+
+# Standard board sizes as (height, width, mines)
+PRESETS = {
+    "beginner": (9, 9, 10),
+    "intermediate": (16, 16, 40),
+    "expert": (16, 30, 99),
+}
+
+
+def play_game(height, width, mines, board_seed=None, ai_seed=None, options=None, ai_options=None):
+    """
+    Plays one game with the AI and returns a dict describing it:
+    whether it was won, how many moves and random guesses were
+    made, how long the game took in seconds, and how long board
+    generation took and in how many attempts.
+
+    The board and the AI's random moves are seeded separately, so
+    the same boards can be replayed against different solvers.
+    `options` are extra keyword arguments for Minesweeper, such
+    as first_click_safe or no_guess, and `ai_options` those for
+    MinesweeperAI, such as exact.
+    """
+    start = time.perf_counter()
+    game = Minesweeper(height=height, width=width, mines=mines, seed=board_seed,
+                       **(options or {}))
+    ai = MinesweeperAI(height=height, width=width, seed=ai_seed, total_mines=mines,
+                       **(ai_options or {}))
+
+    moves = 0
+    guesses = 0
+    won = False
+    safe_cells = height * width - mines
+    while True:
+
+        # Prefer a known safe move, otherwise guess
+        move = ai.make_safe_move()
+        if move is None:
+            move = ai.make_random_move()
+            if move is None:
+                break
+            guesses += 1
+        moves += 1
+
+        game.generate(move)
+        if game.is_mine(move):
+            break
+        ai.add_knowledge_batch(game.reveal(move))
+
+        # Every safe cell has been revealed
+        if len(ai.made_ids) == safe_cells:
+            won = True
+            break
+
+    return {
+        "won": won,
+        "moves": moves,
+        "guesses": guesses,
+        "time": time.perf_counter() - start,
+        "generation_time": game.generation_stats["time"],
+        "attempts": game.generation_stats["attempts"],
+        "solver_time": ai.solver_stats["time"] + ai.linear_stats["time"],
+    }
+
+
+def simulate(games, height, width, mines, seed=None, options=None, ai_options=None):
+    """
+    Plays `games` games on boards of the given size and
+    returns the list of per-game results.
+
+    Each game's board and AI seeds are drawn from `seed`.
+    """
+    rng = random.Random(seed)
+    return [
+        play_game(height, width, mines, rng.getrandbits(64), rng.getrandbits(64),
+                  options, ai_options)
+        for _ in range(games)
+    ]
+
+
+def tally(results):
+    """
+    Adds up per-game results into totals that can be
+    merged with the totals of other shards.
+    """
+    return {
+        "games": len(results),
+        "wins": sum(r["won"] for r in results),
+        "moves": sum(r["moves"] for r in results),
+        "guesses": sum(r["guesses"] for r in results),
+        "time": sum(r["time"] for r in results),
+        "generation_time": sum(r["generation_time"] for r in results),
+        "attempts": sum(r["attempts"] for r in results),
+        "solver_time": sum(r["solver_time"] for r in results),
+        "max_time": max((r["time"] for r in results), default=0.0),
+    }
+
+
+def merge(totals):
+    """
+    Combines the totals of several shards into one.
+    """
+    merged = tally([])
+    for t in totals:
+        for key in ("games", "wins", "moves", "guesses", "time", "generation_time", "attempts",
+                    "solver_time"):
+            merged[key] += t[key]
+        merged["max_time"] = max(merged["max_time"], t["max_time"])
+    return merged
+
+
+def play_shard(shard):
+    """
+    Plays one shard of games with its own random seed and returns
+    its totals. Runs inside worker processes.
+    """
+    games, height, width, mines, seed, options, ai_options = shard
+    return tally(simulate(games, height, width, mines, seed, options, ai_options))
+
+
+def simulate_parallel(games, height, width, mines, workers=None, seed=None,
+                      options=None, ai_options=None):
+    """
+    Plays `games` games split into shards across a pool of worker
+    processes and returns the merged totals.
+
+    Every shard gets its own seed drawn from `seed`, so a run can be
+    replayed exactly with the same seed, whatever the worker count.
+    """
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    seeds = random.Random(seed)
+    shards = []
+    for start in range(0, games, SHARD_SIZE):
+        shard_games = min(SHARD_SIZE, games - start)
+        shards.append((shard_games, height, width, mines, seeds.getrandbits(64),
+                       options, ai_options))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return merge(play_shard(shard) for shard in shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge(pool.map(play_shard, shards))
+
+
+def summarize(totals, elapsed):
+    """
+    Turns totals into win rate, average moves, guesses
+    and time per game, and throughput.
+    """
+    games = totals["games"]
+    if games == 0:
+        return {"games": 0}
+    return {
+        "games": games,
+        "wins": totals["wins"],
+        "win_rate": totals["wins"] / games,
+        "moves": totals["moves"] / games,
+        "guesses": totals["guesses"] / games,
+        "time": totals["time"] / games,
+        "max_time": totals["max_time"],
+        "generation_time": totals["generation_time"] / games,
+        "attempts": totals["attempts"] / games,
+        "solver_time": totals["solver_time"] / games,
+        "games_per_second": games / elapsed if elapsed else float("inf"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play Minesweeper games with the AI, headless.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="standard board size")
+    parser.add_argument("--height", type=int, default=8)
+    parser.add_argument("--width", type=int, default=8)
+    parser.add_argument("--mines", type=int, default=8)
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, 0 for one per core")
+    parser.add_argument("--seed", type=int, help="seed for reproducible runs")
+    parser.add_argument("--first-click-safe", action="store_true",
+                        help="place mines after the first move, never under it")
+    parser.add_argument("--safe-neighborhood", action="store_true",
+                        help="with --first-click-safe, also keep the first cell's neighbors free")
+    parser.add_argument("--no-guess", action="store_true",
+                        help="regenerate boards until solvable without guessing")
+    parser.add_argument("--exact", action="store_true",
+                        help="run the exact solver on frontier components")
+    parser.add_argument("--linear", action="store_true",
+                        help="run Gaussian elimination on frontier components")
+    parser.add_argument("--lazy", action="store_true",
+                        help="defer inference until no safe move is known; the same "
+                             "games are won as without it, except with --exact, where "
+                             "components can outgrow --max-component while deferred")
+    parser.add_argument("--guess", choices=("random", "probability"), default="random",
+                        help="how the AI picks a move when none is known to be safe")
+    parser.add_argument("--max-component", type=int, default=24,
+                        help="largest component, in cells, the exact solver enumerates")
+    args = parser.parse_args()
+
+    if args.preset:
+        height, width, mines = PRESETS[args.preset]
+    else:
+        height, width, mines = args.height, args.width, args.mines
+
+    start = time.perf_counter()
+    options = {
+        "first_click_safe": args.first_click_safe,
+        "safe_neighborhood": args.safe_neighborhood,
+        "no_guess": args.no_guess,
+    }
+    ai_options = {
+        "exact": args.exact,
+        "max_component": args.max_component,
+        "guess": args.guess,
+        "linear": args.linear,
+        "lazy": args.lazy,
+    }
+    totals = simulate_parallel(args.games, height, width, mines,
+                               workers=args.workers, seed=args.seed,
+                               options=options, ai_options=ai_options)
+    stats = summarize(totals, time.perf_counter() - start)
+
+    print(f"Board: {height}x{width}, {mines} mines")
+    print(f"Games: {stats['games']}")
+    if stats["games"]:
+        print(f"Wins: {stats['wins']} ({stats['win_rate']:.1%})")
+        print(f"Moves per game: {stats['moves']:.1f}")
+        print(f"Guesses per game: {stats['guesses']:.2f}")
+        print(f"Time per game: {stats['time'] * 1000:.2f} ms (max {stats['max_time'] * 1000:.2f} ms)")
+        print(f"Board generation: {stats['generation_time'] * 1000:.2f} ms, "
+              f"{stats['attempts']:.2f} attempts per game")
+        if args.exact or args.linear:
+            print(f"Solver: {stats['solver_time'] * 1000:.2f} ms per game")
+        print(f"Throughput: {stats['games_per_second']:.1f} games/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import itertools
+import random
+from collections import Counter
+
+import pytest
+
+from minesweeper import (
+    BitSentence, Knowledge, Minesweeper, MinesweeperAI, Sentence, enumerate_component,
+    reduce_component,
+)
+
+
+def random_component(rng, cells=10, sentences=6):
+    """
+    Returns sentences over a few cells that are all consistent
+    with one hidden assignment of mines, as the AI would see them.
+    """
+    ids = rng.sample(range(64), cells)
+    hidden = {bit: rng.random() < 0.4 for bit in ids}
+    result = []
+    for _ in range(sentences):
+        chosen = rng.sample(ids, rng.randint(2, min(5, cells)))
+        result.append(BitSentence.from_ids(chosen, sum(hidden[bit] for bit in chosen)))
+    return result
+
+
+def brute_force(sentences):
+    """
+    Returns {k: [solutions, {bit: mines}]} over every assignment of the
+    sentences' cells that satisfies all of their counts.
+    """
+    cells = sorted({bit for sentence in sentences for bit in sentence.ids()})
+    tallies = {}
+    for values in itertools.product((0, 1), repeat=len(cells)):
+        assignment = dict(zip(cells, values))
+        if all(sum(assignment[bit] for bit in sentence.ids()) == sentence.count
+               for sentence in sentences):
+            entry = tallies.setdefault(sum(values), [0, Counter()])
+            entry[0] += 1
+            entry[1].update(bit for bit, value in assignment.items() if value)
+    return cells, tallies
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_enumerate_component_matches_brute_force(seed):
+    sentences = random_component(random.Random(seed))
+    cells, tallies = enumerate_component(sentences)
+    expected_cells, expected = brute_force(sentences)
+
+    assert sorted(cells) == expected_cells
+    assert set(tallies) == set(expected)
+    for k, (solutions, counts) in tallies.items():
+        assert solutions == expected[k][0]
+        assert dict(zip(cells, counts)) == {bit: expected[k][1][bit] for bit in cells}
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_reduce_component_only_forces_forced_cells(seed):
+    sentences = random_component(random.Random(seed))
+    cells, tallies = brute_force(sentences)
+    solutions = sum(entry[0] for entry in tallies.values())
+    mines = {bit: sum(entry[1][bit] for entry in tallies.values()) for bit in cells}
+
+    safes, forced_mines = reduce_component(sentences)
+    assert all(mines[bit] == 0 for bit in safes)
+    assert all(mines[bit] == solutions for bit in forced_mines)
+
+
+def test_reduce_component_bounds_overlapping_differences():
+    width = 16
+    a = BitSentence.from_cells({(1, 1), (2, 1), (3, 1)}, 2, width)
+    b = BitSentence.from_cells({(2, 1), (3, 1), (4, 1)}, 1, width)
+    assert reduce_component([a, b]) == ({4 * width + 1}, {1 * width + 1})
+
+
+@pytest.mark.parametrize("excluded", [set(), {0}, {0, 1, 3, 4}, {4, 8}])
+def test_sample_mines_excludes_and_is_uniform(excluded):
+    game = Minesweeper(height=3, width=3, mines=0, seed=0)
+    allowed = [index for index in range(9) if index not in excluded]
+    trials = 6000
+    counts = Counter()
+    for _ in range(trials):
+        picks = game.sample_mines(2, excluded)
+        assert len(set(picks)) == 2
+        assert not set(picks) & excluded
+        counts.update(picks)
+
+    expected = trials * 2 / len(allowed)
+    assert set(counts) == set(allowed)
+    for index in allowed:
+        assert abs(counts[index] - expected) < 0.1 * expected
+
+
+@pytest.mark.parametrize("mines", [1, 4, 7])
+def test_sample_mines_dense_boards(mines):
+    game = Minesweeper(height=3, width=3, mines=0, seed=1)
+    for _ in range(200):
+        picks = game.sample_mines(mines, {4})
+        assert len(set(picks)) == mines
+        assert 4 not in picks
+
+
+@pytest.mark.parametrize("safe_neighborhood", [False, True])
+def test_first_click_exclusions(safe_neighborhood):
+    for seed in range(200):
+        game = Minesweeper(height=5, width=5, mines=10, seed=seed, first_click_safe=True,
+                           safe_neighborhood=safe_neighborhood)
+        game.generate((2, 2))
+        assert len(game.mines) == 10
+        assert not game.is_mine((2, 2))
+        if safe_neighborhood:
+            assert game.nearby_mines((2, 2)) == 0
+
+
+def test_safe_neighborhood_falls_back_when_too_dense():
+    game = Minesweeper(height=3, width=3, mines=5, seed=0, first_click_safe=True,
+                       safe_neighborhood=True)
+    game.generate((1, 1))
+    assert len(game.mines) == 5
+    assert not game.is_mine((1, 1))
+
+
+def assert_consistent(knowledge):
+    """
+    Checks the key, index and component structures of a
+    Knowledge against the sentences it stores.
+    """
+    index = {}
+    for key, sentence in knowledge.sentences.items():
+        assert key == sentence.key()
+        assert sentence.mask
+        for bit in sentence.ids():
+            index.setdefault(bit, set()).add(key)
+    assert knowledge.index == index
+
+    members = set()
+    for root, keys in knowledge.members.items():
+        assert keys
+        assert knowledge.find(root) == root
+        assert not members & keys
+        members |= keys
+        for key in keys:
+            for bit in knowledge.sentences[key].ids():
+                assert knowledge.find(bit) == root
+    assert members == set(knowledge.sentences)
+
+    extent = [bit for bits in knowledge.extent.values() for bit in bits]
+    assert sorted(extent) == sorted(knowledge.parent)
+
+
+@pytest.mark.parametrize("seed", range(100))
+def test_knowledge_stays_consistent_when_marking(seed):
+    rng = random.Random(seed)
+    hidden = {bit: rng.random() < 0.3 for bit in range(40)}
+    knowledge = Knowledge()
+    for _ in range(25):
+        cells = rng.sample(range(40), rng.randint(1, 6))
+        knowledge.add(BitSentence.from_ids(cells, sum(hidden[bit] for bit in cells)))
+    assert_consistent(knowledge)
+
+    for bit in rng.sample(range(40), 40):
+        changed = knowledge.mark(bit, hidden[bit])
+        assert_consistent(knowledge)
+        assert bit not in knowledge.index
+        for sentence in changed:
+            assert knowledge.get(sentence.key()) is sentence
+    assert len(knowledge) == 0
+    assert not knowledge.parent and not knowledge.members
+
+
+def test_knowledge_answers_for_cell_sentences():
+    ai = MinesweeperAI(height=4, width=4)
+    ai.add_knowledge((0, 0), 1)
+    assert Sentence({(0, 1), (1, 0), (1, 1)}, 1) in ai.knowledge
+    assert Sentence({(0, 1), (1, 0)}, 1) not in ai.knowledge
+    assert BitSentence.from_cells({(0, 1), (1, 0), (1, 1)}, 1, 4) in ai.knowledge
+    assert list(ai.knowledge.cell_sentences()) == [Sentence({(0, 1), (1, 0), (1, 1)}, 1)]
+
+    with pytest.raises(TypeError):
+        ((0, 1), 1) in ai.knowledge
+    with pytest.raises(TypeError):
+        Sentence({(0, 1)}, 1) in Knowledge()